@@ -1,9 +1,12 @@
-import pandas as pd
 import numpy as np
-import joblib
 import os
+import sys
 from datetime import datetime, timedelta
 
+# 输出先攒在缓冲区里，等到问用户输入（input会先刷新）或程序结束时再一次写出去
+if hasattr(sys.stdout, 'reconfigure'):
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
+
 print("🔮 SoupAIDD 预测系统启动！")
 print("=" * 50)
 
@@ -11,14 +14,18 @@ print("=" * 50)
 current_folder = os.path.dirname(os.path.abspath(__file__))
 
 try:
-    model = joblib.load(os.path.join(current_folder, 'soup_predictor_model.pkl'))
-    label_encoder = joblib.load(os.path.join(current_folder, 'label_encoder.pkl'))
-    feature_columns = joblib.load(os.path.join(current_folder, 'feature_columns.pkl'))
+    from soup_model import (
+        base_columns, soup_names, feature_columns, ingredient_names,
+        ingredient_index, typical_dict, predict_batch
+    )
     print("✅ AI模型加载成功！")
-    print(f"   已学习汤品：{', '.join(label_encoder.classes_)}")
+    print(f"   已学习汤品：{', '.join(soup_names)}")
 except FileNotFoundError:
     print("❌ 错误：找不到模型文件！请先运行 train_model.py 训练模型")
     exit()
+except ValueError as e:
+    print(f"❌ 错误：{e}")
+    exit()
 
 # ===== 第2步：获取用户输入（明天的信息） =====
 print("\n📅 请输入明天的信息：")
@@ -29,11 +36,12 @@ if not date_input:
     tomorrow = datetime.now() + timedelta(days=1)
     date_input = tomorrow.strftime("%Y-%m-%d")
     print(f"   使用默认：{date_input}")
+parsed_date = datetime.strptime(date_input, "%Y-%m-%d")  # 只解析一次，星期和月份都从这里取
 
 # 星期
 weekday = input("星期几（1=周一，7=周日，回车自动计算）：").strip()
 if not weekday:
-    weekday = str(datetime.strptime(date_input, "%Y-%m-%d").isoweekday())
+    weekday = str(parsed_date.isoweekday())
     print(f"   自动判断：星期{weekday}")
 
 # 天气
@@ -55,46 +63,47 @@ is_weekend = 1 if weekday in ['6', '7'] else 0
 print(f"   是否周末：{'是' if is_weekend else '否'}")
 
 # 月份和季节
-month = datetime.strptime(date_input, "%Y-%m-%d").month
+month = parsed_date.month
 season = 1 if month in [3,4,5] else 2 if month in [6,7,8] else 3 if month in [9,10,11] else 4
 print(f"   月份：{month}月，季节编码：{season}")
 
 # ===== 第3步：获取冰箱库存 =====
 print("\n🥬 冰箱现在有什么食材？（输入学过的食材，用逗号分隔）")
-print(f"   可选食材：{', '.join([col.replace('食材_', '') for col in feature_columns if col.startswith('食材_')])}")
+print(f"   可选食材：{', '.join(ingredient_names)}")
 
 inventory_input = input("库存食材：").strip()
 inventory_list = [i.strip() for i in inventory_input.replace('，', ',').split(',') if i.strip()]
+inventory_set = set(inventory_list)  # 查“有没有”用集合，O(1)
 
 # ===== 第4步：构建预测数据 =====
 print("\n🔧 分析中...")
 
-# 创建数据框
-tomorrow_data = pd.DataFrame([{
-    '温度': temp,
-    '天气编码': weather_code,
-    '月份': month,
-    '季节编码': season,
-    '是否周末': is_weekend,
-    '反馈分数': 75  # 默认中等期待
-}])
+# 直接建一行特征向量（列顺序和训练时一致；多天一起预测用 soup_model.build_batch_features）
+tomorrow_features = np.zeros((1, len(feature_columns)), dtype=np.float32)
+tomorrow_features[0, :len(base_columns)] = [  # 顺序同 base_columns
+    temp,
+    weather_code,
+    month,
+    season,
+    is_weekend,
+    75  # 反馈分数：默认中等期待
+]
 
 # 添加食材特征（有就在冰箱里标1，没有标0）
-for col in feature_columns:
-    if col.startswith('食材_'):
-        ingredient_name = col.replace('食材_', '')
-        tomorrow_data[col] = 1 if ingredient_name in inventory_list else 0
-
-# 确保列顺序和训练时一致
-tomorrow_features = tomorrow_data[feature_columns]
+for ing in inventory_set:
+    i = ingredient_index.get(ing)
+    if i is not None:
+        tomorrow_features[0, i] = 1.0
 
 # ===== 第5步：AI预测 =====
-# 预测概率（看所有汤的可能性）
-probabilities = model.predict_proba(tomorrow_features)[0]
+# 预测概率（看所有汤的可能性；要预测多天就把每天一行叠起来一次传进去）
+probabilities = predict_batch(tomorrow_features)[0]
 
 # 获取排名前3的汤
-top3_indices = np.argsort(probabilities)[-3:][::-1]  # 从大到小
-top3_soups = label_encoder.inverse_transform(top3_indices)
+k = min(3, len(probabilities))  # 学过的汤不到3种时就全取
+top3_indices = np.argpartition(probabilities, -k)[-k:]  # 只挑出前k个，不用全部排序
+top3_indices = top3_indices[np.argsort(-probabilities[top3_indices])]  # 从大到小
+top3_soups = [soup_names[i] for i in top3_indices]
 top3_probs = probabilities[top3_indices]
 
 # ===== 第6步：输出结果 =====
@@ -123,21 +132,14 @@ print(f"\n   冰箱库存：{', '.join(inventory_list) if inventory_list else '
 # 检查缺什么食材（对比第一推荐的配方）
 print(f"\n📋 如果要煲【{top3_soups[0]}】：")
 
-# 从训练数据中找到这个汤的标准配方
-history_df = pd.read_csv(os.path.join(current_folder, 'history_cleaned.csv'), encoding='utf-8')
-soup_history = history_df[history_df['汤名'] == top3_soups[0]]
+# 从训练时保存的配方表里找这个汤通常用什么食材
+typical_ingredients = typical_dict.get(top3_soups[0])
 
-if not soup_history.empty:
-    # 找出这种汤通常用什么食材
-    typical_ingredients = []
-    for col in feature_columns:
-        if col.startswith('食材_') and soup_history[col].mean() > 0.5:
-            typical_ingredients.append(col.replace('食材_', ''))
-    
+if typical_ingredients is not None:
     print(f"   通常需要：{', '.join(typical_ingredients)}")
     
     # 检查缺什么
-    missing = [ing for ing in typical_ingredients if ing not in inventory_list]
+    missing = [ing for ing in typical_ingredients if ing not in inventory_set]
     if missing:
         print(f"   ⚠️  缺少食材：{', '.join(missing)}（建议购买）")
     else:
@@ -159,7 +161,11 @@ print("=" * 50)
 # 保存预测记录（方便以后对比AI猜得准不准）
 save_record = input("\n是否保存这次预测到记录？(y/n)：").strip().lower()
 if save_record == 'y':
-    record_file = os.path.join(current_folder, 'predictions_log.txt')
-    with open(record_file, 'a', encoding='utf-8') as f:
-        f.write(f"{date_input} | 预测：{top3_soups[0]} | 概率：{top3_probs[0]*100:.1f}% | 天气：{weather_str} {temp}°C\n")
-    print("✅ 已保存到 predictions_log.txt")
\ No newline at end of file
+    # 制表符分隔的新文件（以后可以直接 pd.read_csv(sep='\t') 分析准确率；旧的 predictions_log.txt 格式不同，不混在一起）
+    record_file = os.path.join(current_folder, 'predictions_log.tsv')
+    record = f"{date_input}\t{top3_soups[0]}\t{top3_probs[0]:.4f}\t{weather_str}\t{temp}\n"
+    if not os.path.exists(record_file):
+        record = "日期\t预测汤品\t概率(0-1)\t天气\t温度\n" + record  # 第一次写先加表头
+    with open(record_file, 'a', encoding='utf-8', buffering=8192) as f:
+        f.write(record)
+    print("✅ 已保存到 predictions_log.tsv")
\ No newline at end of file
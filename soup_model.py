@@ -0,0 +1,83 @@
+# 加载训练好的AI模型，提供预测函数
+# predict.py 用它做单条预测；其它脚本也可以 import 它一次批量预测很多天：
+#     from soup_model import build_batch_features, predict_batch
+#     probs = predict_batch(build_batch_features(base, inventories))
+# 装了numba的话，批量建特征会用numba编译成并行的原生循环（可选，没装就是普通Python）
+# 还没训练过（找不到模型文件）时，import 会抛 FileNotFoundError
+
+import numpy as np
+import joblib
+import functools
+import os
+
+try:
+    import tl2cgen
+except ImportError:  # 没装 tl2cgen 就不用编译好的原生模型
+    tl2cgen = None
+
+current_folder = os.path.dirname(os.path.abspath(__file__))
+
+# 优先用编译好的原生模型，没有才用sklearn模型
+lib_path = os.path.join(current_folder, 'soup_forest.so')
+predictor = model = None
+if tl2cgen is not None and os.path.exists(lib_path):
+    predictor = tl2cgen.Predictor(lib_path)
+else:
+    model = joblib.load(os.path.join(current_folder, 'soup_predictor_model.pkl'), mmap_mode='r')
+
+meta = joblib.load(os.path.join(current_folder, 'model_meta.pkl'))
+soup_names = meta['soup_names']
+feature_columns = meta['feature_columns']
+ingredient_names = meta['ingredient_names']
+ingredient_index = meta['ingredient_index']
+typical_dict = meta['typical_ingredients']
+
+# 前6个特征按固定顺序直接填值，必须和 train_model.py 里的 feature_columns 开头一致
+base_columns = ['温度', '天气编码', '月份', '季节编码', '是否周末', '反馈分数']
+if feature_columns[:len(base_columns)] != base_columns:
+    raise ValueError("模型的特征顺序和预测脚本对不上！请重新运行 train_model.py 训练模型")
+
+
+def predict_batch(features_matrix):
+    """一次预测多天：输入(N, 特征数)的float32矩阵，返回(N, 汤数)的概率矩阵"""
+    features_matrix = np.ascontiguousarray(features_matrix, dtype=np.float32)
+    if predictor is not None:
+        probs = predictor.predict(tl2cgen.DMatrix(features_matrix)).reshape(len(features_matrix), -1)
+        if probs.shape[1] == 1:  # 只学过两种汤时，原生模型只输出第2种的概率
+            probs = np.hstack([1 - probs, probs])
+    else:
+        probs = model.predict_proba(features_matrix)
+    if probs.shape[1] != len(soup_names):
+        raise ValueError(f"模型输出了{probs.shape[1]}种汤的概率，但记录里有{len(soup_names)}种汤，请重新运行 train_model.py")
+    return probs
+
+
+@functools.lru_cache(maxsize=None)
+def _fill_kernel():
+    """第一次批量建特征时才导入numba并编译（单条预测用不着，导入和编译比填一行还慢）"""
+    try:
+        from numba import njit, prange
+    except ImportError:  # 没装 numba 就按普通Python循环跑
+        njit, prange = None, range
+
+    def fill_features(inv_ids_flat, inv_offsets, base, out):
+        """把每行的基础特征和库存食材填进特征矩阵（第r行的食材列位置是inv_ids_flat[inv_offsets[r]:inv_offsets[r+1]]）"""
+        n_base = base.shape[1]
+        for r in prange(out.shape[0]):
+            out[r, :n_base] = base[r]
+            for k in range(inv_offsets[r], inv_offsets[r + 1]):
+                out[r, inv_ids_flat[k]] = 1.0
+
+    return fill_features if njit is None else njit(parallel=True)(fill_features)
+
+
+def build_batch_features(base, inventories):
+    """一次建多天的特征矩阵：base是(N, len(base_columns))基础特征，inventories是N份库存食材；返回(N, 特征数)的float32矩阵"""
+    ids = [[ingredient_index[ing] for ing in inv if ing in ingredient_index] for inv in inventories]
+    inv_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in ids], out=inv_offsets[1:])
+    inv_ids_flat = np.array([i for row in ids for i in row], dtype=np.int32)
+
+    out = np.zeros((len(ids), len(feature_columns)), dtype=np.float32)
+    _fill_kernel()(inv_ids_flat, inv_offsets, np.asarray(base, dtype=np.float32), out)
+    return out
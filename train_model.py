@@ -1,17 +1,48 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report
+from sklearn.utils.class_weight import compute_sample_weight
 import joblib
 import os
 
+try:
+    import treelite.sklearn
+    import tl2cgen
+except ImportError:  # 没装 treelite/tl2cgen 就不编译原生模型
+    tl2cgen = None
+
 print("🤖 开始训练汤品预测AI...")
 
 # ===== 第1步：加载清洗好的数据 =====
 current_folder = os.path.dirname(os.path.abspath(__file__))
-history_df = pd.read_csv(os.path.join(current_folder, 'history_cleaned.csv'), encoding='utf-8')
+csv_path = os.path.join(current_folder, 'history_cleaned.csv')
+parquet_path = os.path.join(current_folder, 'history_cleaned.parquet')
+
+history_df = None
+if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+    # CSV没改过，直接读缓存的Parquet（列类型已经存好了，读得快很多）
+    try:
+        history_df = pd.read_parquet(parquet_path)
+    except ImportError:  # 没装pyarrow读不了缓存，改读CSV
+        pass
+
+if history_df is None:
+    history_df = pd.read_csv(csv_path, encoding='utf-8')
+
+    # 食材列只有0/1，用uint8；汤名重复很多，用category
+    cols = [col for col in history_df.columns if col.startswith('食材_')]
+    history_df[cols] = history_df[cols].fillna(0).astype(np.uint8)
+    history_df['汤名'] = history_df['汤名'].astype('category')
+
+    # 存一份Parquet，下次训练直接读（没装pyarrow就算了）
+    try:
+        history_df.to_parquet(parquet_path, engine='pyarrow', compression='zstd')
+    except ImportError:
+        pass
 
 print(f"📊 加载数据：{len(history_df)}条历史记录")
 
@@ -31,7 +62,7 @@ print(f"   使用特征：{len(feature_columns)}个")
 print(f"   包括：天气、温度、季节、是否周末、反馈分数、{len(ingredient_cols)}种食材")
 
 # 构建X（特征矩阵）
-X = history_df[feature_columns].fillna(0)  # 如果有空值填0
+X = history_df[feature_columns].fillna(0).astype(np.float32)  # 如果有空值填0；float32省一半内存
 
 # 构建y（标签：要预测的目标——汤名）
 y = history_df['汤名']
@@ -64,20 +95,29 @@ else:
     X_test, y_test = None, None
     print(f"   数据较少（{len(history_df)}条），全部用于学习（暂不测试准确率）")
 
+# 转成行优先的连续float32数组（树模型一次看一整行，行连续更省缓存）
+X_train = np.ascontiguousarray(X_train, dtype=np.float32)
+if X_test is not None:
+    X_test = np.ascontiguousarray(X_test, dtype=np.float32)
+
 # ===== 第4步：训练模型（核心！）=====
-print("\n🎯 开始训练随机森林模型...")
+print("\n🎯 开始训练梯度提升模型...")
 
-# 创建模型（随机森林：由100棵决策树投票决定，不容易错）
-model = RandomForestClassifier(
-    n_estimators=100,      # 100棵树投票
+# 创建模型（梯度提升：40轮，每轮一棵小树专门纠正前面的错误）
+# 特征会先分箱成uint8直方图，训练和预测都比随机森林快
+model = HistGradientBoostingClassifier(
+    max_iter=40,           # 最多40轮（几十条数据用不着100轮，模型文件更小、加载和预测更快）
     max_depth=5,           # 树不要太深（防止死记硬背）
-    min_samples_split=2,   # 最少2个样本才分叉
-    random_state=42,       # 固定随机种子（每次结果一样）
-    class_weight='balanced' # 如果某汤出现少，也公平对待
+    learning_rate=0.1,     # 每轮只纠正一小步
+    min_samples_leaf=1,    # 数据少，叶子里有1个样本就行（默认20会一棵树都分不了叉）
+    random_state=42        # 固定随机种子（每次结果一样）
 )
 
+# 样本权重：如果某汤出现少，也公平对待（只算一次，不用每棵树都重新算）
+sample_weight = compute_sample_weight('balanced', y_train)
+
 # 开始训练（拟合）
-model.fit(X_train, y_train)
+model.fit(X_train, y_train, sample_weight=sample_weight)
 print("   ✅ 模型训练完成！")
 
 # ===== 第5步：评估模型（看看学得怎么样）=====
@@ -101,35 +141,68 @@ else:
 # ===== 第6步：看看AI最看重什么特征（可解释性）=====
 print("\n🔍 AI决策依据（特征重要性）：")
 
-# 获取特征重要性
-importances = model.feature_importances_
-feature_importance_df = pd.DataFrame({
-    '特征': feature_columns,
-    '重要性': importances
-}).sort_values('重要性', ascending=False)
-
-# 显示前5个重要特征
-print("   最重要的5个因素：")
-for idx, row in feature_importance_df.head(5).iterrows():
-    print(f"   {row['特征']}: {row['重要性']*100:.1f}%")
+if X_test is not None:
+    # 获取特征重要性（梯度提升没有自带的，用在测试集上打乱某一列后准确率掉多少来衡量）
+    importances = permutation_importance(
+        model, X_test, y_test, n_repeats=5, random_state=42
+    ).importances_mean
+
+    # 显示前5个重要特征（只挑出前5再排序，不用把所有特征都排一遍）
+    top5 = np.argpartition(importances, -5)[-5:]
+    top5 = top5[np.argsort(-importances[top5])]
+    print("   最重要的5个因素：")
+    for i in top5:
+        print(f"   {feature_columns[i]}: {importances[i]*100:.1f}%")
+else:
+    # 没有测试集时，模型把训练数据全背下来了，在训练集上打乱哪一列都看不出区别
+    print("   没有单独的测试集，暂不分析（建议积累20条以上数据再看）")
 
 # ===== 第7步：保存模型（下次直接加载用）=====
 print("\n💾 保存模型文件...")
 
-# 保存模型
+# 保存模型（不压缩，预测时可以直接内存映射读取，不用整个拷进内存）
 model_path = os.path.join(current_folder, 'soup_predictor_model.pkl')
-joblib.dump(model, model_path)
-
-# 保存标签编码器（把数字变回汤名用）
-encoder_path = os.path.join(current_folder, 'label_encoder.pkl')
-joblib.dump(label_encoder, encoder_path)
-
-# 保存特征列表（预测时要知道有哪些特征）
-feature_path = os.path.join(current_folder, 'feature_columns.pkl')
-joblib.dump(feature_columns, feature_path)
+joblib.dump(model, model_path, compress=0, protocol=5)
+
+# 每种汤的常用食材（预测时直接查表，不用再读历史CSV）
+typical = history_df.groupby('汤名', observed=True)[ingredient_cols].mean() > 0.5
+ingredient_names = typical.columns.str.replace('食材_', '')
+typical_dict = {
+    soup: ingredient_names[mask].tolist()
+    for soup, mask in zip(typical.index, typical.to_numpy())
+}
+
+# 预测要用的其它东西打包成一个文件（预测时只加载一次，也不会和训练时对不上）
+meta = {
+    'soup_names': label_encoder.classes_.tolist(),  # 把数字变回汤名用（存成普通列表，预测时不用导入sklearn）
+    'feature_columns': feature_columns,      # 预测时要知道有哪些特征
+    'ingredient_names': ingredient_names.tolist(),
+    'ingredient_index': {col[3:]: i for i, col in enumerate(feature_columns) if col.startswith('食材_')},  # 食材名→特征列位置
+    'typical_ingredients': typical_dict,
+}
+meta_path = os.path.join(current_folder, 'model_meta.pkl')
+joblib.dump(meta, meta_path)
+
+# 注意：skl2onnx 转不了 HistGradientBoostingClassifier（会报 Expected an int, got a boolean），所以不再导出ONNX
+
+# 把模型编译成原生动态库（每棵树展开成if/else，由gcc编译）
+lib_path = os.path.join(current_folder, 'soup_forest.so')
+lib_ok = False
+if tl2cgen is not None:
+    try:
+        tl_model = treelite.sklearn.import_model(model)
+        tl2cgen.export_lib(tl_model, toolchain='gcc', libpath=lib_path,
+                           params={'parallel_comp': 4}, verbose=False)
+        lib_ok = True
+    except Exception as e:  # 比如没装gcc：跳过，预测时会用sklearn模型
+        print(f"   ⚠️  原生模型编译失败，跳过：{e}")
+if not lib_ok and os.path.exists(lib_path):
+    os.remove(lib_path)  # 删掉旧的，免得预测时用上过期模型
 
 print(f"   ✅ 模型已保存：soup_predictor_model.pkl")
-print(f"   ✅ 标签映射已保存：label_encoder.pkl")
+if lib_ok:
+    print(f"   ✅ 原生模型已编译：soup_forest.so")
+print(f"   ✅ 标签映射、特征列表、常用食材已保存：model_meta.pkl")
 print(f"\n🎉 训练完成！你的AI已经学会了{len(label_encoder.classes_)}种汤的配方！")
 
 # ===== 彩蛋：测试预测明天 =====